@@ -1,11 +1,119 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import Response
-from app.models import ExportRequest, Model3D
+import asyncio
+import gzip
+import hashlib
+import threading
+import traceback
+from collections import OrderedDict
+from binascii import b2a_base64
+import orjson
+from app.models import ExportRequest, Model3D, AeroParameters, GeometryData, ModelMetadata
 from app.services import export_service
+from app.core import settings
 import app.api.generation as generation
 
 router = APIRouter(prefix="/export", tags=["export"])
 
+# Downloads smaller than this are sent uncompressed
+GZIP_MIN_SIZE = 1024
+
+# LRU cache of client-supplied models keyed by a hash of the raw request body,
+# so repeating an identical export request validates the model only once
+MODEL_CACHE_SIZE = 8
+_model_cache: OrderedDict = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+
+async def _read_json_body(req: Request) -> tuple[dict, bytearray]:
+    """
+    Read and decode the raw request body with orjson, returning (body, raw bytes).
+    Mesh payloads can be several MB of numbers, so skip Starlette's stdlib json path.
+    Bodies over settings.max_export_body_size are rejected with 413, whether announced
+    by Content-Length or discovered while streaming.
+    """
+    max_size = settings.max_export_body_size
+    try:
+        content_length = int(req.headers.get("content-length", "0"))
+    except ValueError:
+        content_length = 0
+
+    # Reject oversized bodies before allocating anything for them
+    if content_length > max_size:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds {max_size} bytes")
+
+    # Fill a buffer sized from Content-Length instead of growing it chunk by chunk
+    buf = bytearray(max(content_length, 0))
+    offset = 0
+    async for chunk in req.stream():
+        end = offset + len(chunk)
+        if end > max_size:
+            raise HTTPException(status_code=413, detail=f"Request body exceeds {max_size} bytes")
+        buf[offset:end] = chunk
+        offset = end
+    # Trim in case the client sent fewer bytes than announced
+    del buf[offset:]
+
+    try:
+        return orjson.loads(buf), buf
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
+
+def _parse_model(model_obj: dict, raw_body: bytes | bytearray, trusted: bool = False) -> Model3D:
+    """
+    Build a Model3D from a client-supplied model, reusing the result for identical
+    request bodies. The already-received raw bytes are hashed, so the multi-MB
+    model is never re-encoded just to compute a cache key.
+
+    Trusted payloads (a client echoing back a model this server generated) skip
+    Pydantic validation of the bulky geometry via model_construct; the cheap scalar
+    fields are still checked here, and malformed geometry fails with ValueError in
+    the export service's numpy conversion.
+    """
+    key = (hashlib.blake2b(raw_body, digest_size=16).digest(), trusted)
+    with _model_cache_lock:
+        model = _model_cache.get(key)
+        if model is not None:
+            _model_cache.move_to_end(key)
+            return model
+
+    if trusted and isinstance(model_obj.get("geometry"), dict):
+        if not isinstance(model_obj.get("name"), str):
+            raise ValueError("model.name must be a string")
+        if "id" in model_obj and not isinstance(model_obj["id"], str):
+            raise ValueError("model.id must be a string")
+        model = Model3D.model_construct(**{
+            **model_obj,
+            "parameters": AeroParameters.model_construct(**(model_obj.get("parameters") or {})),
+            # Bulk lists are not re-validated, but the encoding contract still is
+            "geometry": GeometryData.model_construct(**model_obj["geometry"]).check_encoding(),
+            "metadata": ModelMetadata.model_construct(**(model_obj.get("metadata") or {})),
+        })
+    else:
+        model = Model3D.parse_obj(model_obj)
+
+    with _model_cache_lock:
+        _model_cache[key] = model
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+
+    return model
+
+
+def _compress_for_client(req: Request, payload: bytes, headers: dict) -> bytes:
+    """
+    Gzip a download payload when the client advertises support for it.
+    Mesh files are highly repetitive and typically shrink several times over.
+    """
+    accept_encoding = req.headers.get("accept-encoding", "")
+    if len(payload) < GZIP_MIN_SIZE or "gzip" not in accept_encoding.lower():
+        return payload
+
+    headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    return gzip.compress(payload, compresslevel=6)
+
 
 @router.post("/stl")
 async def export_stl(req: Request):
@@ -13,10 +121,11 @@ async def export_stl(req: Request):
     Export model as STL file.
     """
     # Read raw JSON body so we can accept either { model_id, options }
-    body = await req.json()
+    body, raw_body = await _read_json_body(req)
     model_id = body.get("model_id")
     options = body.get("options")
     model_obj = body.get("model")
+    trusted = bool(body.get("trusted", False))
 
     # Debug: log current model vs requested id to diagnose 404s
     try:
@@ -32,7 +141,7 @@ async def export_stl(req: Request):
     elif model_obj:
         # Client provided full model in request body; validate via Pydantic
         try:
-            model_to_use = Model3D.parse_obj(model_obj)
+            model_to_use = _parse_model(model_obj, raw_body, trusted)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid model in request: {e}")
     else:
@@ -45,7 +154,8 @@ async def export_stl(req: Request):
         if isinstance(options, dict):
             inspect_flag = bool(options.get('inspect', False))
 
-        result = export_service.export_stl(model_to_use, options)
+        # Mesh reconstruction/serialization is CPU-bound: keep it off the event loop
+        result = await asyncio.to_thread(export_service.export_stl, model_to_use, options)
 
         # export_stl may return (bytes, metadata) when inspect=True
         if inspect_flag and isinstance(result, tuple):
@@ -60,30 +170,35 @@ async def export_stl(req: Request):
                 except Exception:
                     stl_text = None
             else:
-                import base64
-                stl_b64 = base64.b64encode(stl_bytes).decode('ascii')
+                stl_b64 = b2a_base64(stl_bytes, newline=False).decode('ascii')
 
-            return {
+            # Serialize directly with orjson; the multi-MB base64 string skips jsonable_encoder
+            payload = orjson.dumps({
                 'filename': f"{model_to_use.name}.stl",
                 'ascii': ascii_mode,
                 'stl_text': stl_text,
                 'stl_b64': stl_b64,
                 'metadata': metadata,
-            }
+            })
+            return Response(content=payload, media_type="application/json")
 
         # Normal case: return bytes for download
         stl_bytes = result if not isinstance(result, tuple) else result[0]
+        headers = {
+            "Content-Disposition": f"attachment; filename={model_to_use.name}.stl"
+        }
+        content = await asyncio.to_thread(_compress_for_client, req, stl_bytes, headers)
         return Response(
-            content=stl_bytes,
+            content=content,
             media_type="application/sla",
-            headers={
-                "Content-Disposition": f"attachment; filename={model_to_use.name}.stl"
-            }
+            headers=headers
         )
 
+    except (ValueError, IndexError) as e:
+        # Malformed client geometry (non-numeric values, bad shapes, out-of-range indices)
+        raise HTTPException(status_code=400, detail=f"Invalid model geometry: {e}")
     except Exception as e:
         # Print traceback to server logs for debugging
-        import traceback
         print("[EXPORT] Exception while exporting STL:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -95,10 +210,11 @@ async def export_step(req: Request):
     Export model as STEP file.
     Note: Requires pythonOCC - currently not implemented.
     """
-    body = await req.json()
+    body, raw_body = await _read_json_body(req)
     model_id = body.get("model_id")
     options = body.get("options")
     model_obj = body.get("model")
+    trusted = bool(body.get("trusted", False))
 
     try:
         current_id = generation.current_model.id if generation.current_model is not None else None
@@ -111,14 +227,14 @@ async def export_step(req: Request):
         model_to_use = generation.current_model
     elif model_obj:
         try:
-            model_to_use = Model3D.parse_obj(model_obj)
+            model_to_use = _parse_model(model_obj, raw_body, trusted)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid model in request: {e}")
     else:
         raise HTTPException(status_code=404, detail="Model not found")
 
     try:
-        step_data = export_service.export_step(model_to_use, options)
+        step_data = await asyncio.to_thread(export_service.export_step, model_to_use, options)
         return Response(
             content=step_data,
             media_type="application/step",
@@ -131,7 +247,7 @@ async def export_step(req: Request):
         # STEP export not implemented on this platform. Fall back to OBJ export
         try:
             print(f"[EXPORT STEP] STEP not implemented, falling back to OBJ: {e}")
-            obj_bytes = export_service.export_obj(model_to_use)
+            obj_bytes = await asyncio.to_thread(export_service.export_obj, model_to_use)
             return Response(
                 content=obj_bytes,
                 media_type="text/plain",
@@ -140,6 +256,8 @@ async def export_step(req: Request):
                     "X-Export-Fallback": "obj"
                 }
             )
+        except (ValueError, IndexError) as e2:
+            raise HTTPException(status_code=400, detail=f"Invalid model geometry: {e2}")
         except Exception as e2:
             raise HTTPException(status_code=501, detail=f"STEP export not implemented and OBJ fallback failed: {e2}")
     except Exception as e:
@@ -152,10 +270,11 @@ async def export_iges(req: Request):
     Export model as IGES file.
     Note: Requires pythonOCC - currently not implemented.
     """
-    body = await req.json()
+    body, raw_body = await _read_json_body(req)
     model_id = body.get("model_id")
     options = body.get("options")
     model_obj = body.get("model")
+    trusted = bool(body.get("trusted", False))
 
     try:
         current_id = generation.current_model.id if generation.current_model is not None else None
@@ -168,14 +287,14 @@ async def export_iges(req: Request):
         model_to_use = generation.current_model
     elif model_obj:
         try:
-            model_to_use = Model3D.parse_obj(model_obj)
+            model_to_use = _parse_model(model_obj, raw_body, trusted)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid model in request: {e}")
     else:
         raise HTTPException(status_code=404, detail="Model not found")
 
     try:
-        iges_data = export_service.export_iges(model_to_use, options)
+        iges_data = await asyncio.to_thread(export_service.export_iges, model_to_use, options)
         return Response(
             content=iges_data,
             media_type="application/iges",
@@ -188,7 +307,7 @@ async def export_iges(req: Request):
         # IGES not implemented - fall back to OBJ for usability
         try:
             print(f"[EXPORT IGES] IGES not implemented, falling back to OBJ: {e}")
-            obj_bytes = export_service.export_obj(model_to_use)
+            obj_bytes = await asyncio.to_thread(export_service.export_obj, model_to_use)
             return Response(
                 content=obj_bytes,
                 media_type="text/plain",
@@ -197,6 +316,8 @@ async def export_iges(req: Request):
                     "X-Export-Fallback": "obj"
                 }
             )
+        except (ValueError, IndexError) as e2:
+            raise HTTPException(status_code=400, detail=f"Invalid model geometry: {e2}")
         except Exception as e2:
             raise HTTPException(status_code=501, detail=f"IGES export not implemented and OBJ fallback failed: {e2}")
     except Exception as e:
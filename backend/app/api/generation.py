@@ -1,17 +1,26 @@
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import ValidationError
 from app.models import GenerateRequest, UpdateParametersRequest, GenerateResponse
-from app.services import ai_service, geometry_service
+from app.services import ai_service, geometry_service, export_service
 import time
+import traceback
 
 router = APIRouter(prefix="/generate", tags=["generation"])
 
+# Clients that can decode base64 float32/uint32 buffers opt in with this header
+GEOMETRY_ENCODING_HEADER = "x-geometry-encoding"
+
+
+def _wants_packed_geometry(http_request: Request) -> bool:
+    """Legacy clients (no header) keep receiving geometry as JSON number lists."""
+    return http_request.headers.get(GEOMETRY_ENCODING_HEADER, "").lower() == "base64"
+
 # In-memory storage for current model (in production, use database)
 current_model = None
 
 
 @router.post("/from-text", response_model=GenerateResponse)
-async def generate_from_text(request: GenerateRequest):
+async def generate_from_text(request: GenerateRequest, http_request: Request):
     """
     Generate 3D model from text description using AI.
     """
@@ -27,7 +36,8 @@ async def generate_from_text(request: GenerateRequest):
         model = geometry_service.create_model_from_parameters(
             params=parameters,
             source_prompt=request.prompt,
-            generated_from="text"
+            generated_from="text",
+            packed_geometry=_wants_packed_geometry(http_request)
         )
         t1 = time.time()
         print(f"[GEN] create_model_from_parameters took {t1 - t0:.2f}s", flush=True)
@@ -35,6 +45,7 @@ async def generate_from_text(request: GenerateRequest):
         # Store in memory (temporary)
         global current_model
         current_model = model
+        export_service.clear_stl_cache()
 
         return GenerateResponse(
             success=True,
@@ -70,12 +81,14 @@ async def update_parameters(req: Request):
         model = geometry_service.create_model_from_parameters(
             params=parsed.parameters,
             source_prompt=None,
-            generated_from="manual"
+            generated_from="manual",
+            packed_geometry=_wants_packed_geometry(req)
         )
 
         # Store in memory
         global current_model
         current_model = model
+        export_service.clear_stl_cache()
 
         return GenerateResponse(
             success=True,
@@ -108,7 +121,6 @@ async def generate_from_chat(request: GenerateRequest):
 
     except Exception as e:
         print(f"Error generating from chat: {e}")
-        import traceback
         traceback.print_exc()
         return {
             "success": False,
@@ -117,7 +129,7 @@ async def generate_from_chat(request: GenerateRequest):
 
 
 @router.post("/compile-aircraft", response_model=GenerateResponse)
-async def compile_aircraft(request: dict):
+async def compile_aircraft(request: dict, http_request: Request):
     """
     Compile all aircraft components into a single unified model.
     """
@@ -141,11 +153,15 @@ async def compile_aircraft(request: dict):
             )
 
         # Compile the aircraft by merging geometries with AI-powered assembly
-        compiled_model = await geometry_service.compile_aircraft_components(components, component_names, aircraft_data)
+        compiled_model = await geometry_service.compile_aircraft_components(
+            components, component_names, aircraft_data,
+            packed_geometry=_wants_packed_geometry(http_request)
+        )
 
         # Store in memory
         global current_model
         current_model = compiled_model
+        export_service.clear_stl_cache()
 
         return GenerateResponse(
             success=True,
@@ -154,7 +170,6 @@ async def compile_aircraft(request: dict):
 
     except Exception as e:
         print(f"Error compiling aircraft: {e}")
-        import traceback
         traceback.print_exc()
         return GenerateResponse(
             success=False,
@@ -163,7 +178,7 @@ async def compile_aircraft(request: dict):
 
 
 @router.post("/edit-component")
-async def edit_component(request: dict):
+async def edit_component(request: dict, http_request: Request):
     """
     Edit a component using natural language commands.
     Supports: size changes, rotation, position, and parameter updates.
@@ -239,7 +254,8 @@ async def edit_component(request: dict):
             updated_model = geometry_service.create_model_from_parameters(
                 params=updated_params,
                 source_prompt=f"Edited via chat: {prompt}",
-                generated_from="edit"
+                generated_from="edit",
+                packed_geometry=_wants_packed_geometry(http_request)
             )
 
             return {
@@ -299,7 +315,8 @@ async def edit_component(request: dict):
             updated_model = geometry_service.create_model_from_parameters(
                 params=updated_params,
                 source_prompt=f"Scaled via chat: {prompt}",
-                generated_from="edit"
+                generated_from="edit",
+                packed_geometry=_wants_packed_geometry(http_request)
             )
 
             return {
@@ -327,7 +344,6 @@ async def edit_component(request: dict):
 
     except Exception as e:
         print(f"Error editing component: {e}")
-        import traceback
         traceback.print_exc()
         return {
             "success": False,
@@ -1,99 +1,118 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import Response
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
 import math
 
+try:
+    # Optional: JIT-compile the physics kernel when numba is installed
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
 router = APIRouter(prefix="/simulate", tags=["simulation"])
 
+# --- PHYSICAL CONSTANTS (hoisted out of the request path) ---
+SEA_LEVEL_DENSITY = 1.225          # kg/m3
+INV_SCALE_HEIGHT = 1.0 / 8500.0    # 1/m, exponential atmosphere
+
+# Real structural testing uses Limit Load Factor (2.5G for Transport/Commercial)
+LOAD_FACTOR_G = 2.5
+# Lift Coefficient (Cl) during high-G pull up
+CL_MANEUVER = 1.5
+# Wing Area ≈ Span * Chord * 0.85 (Trapezoidal approx)
+AREA_FACTOR = 0.85
+# Lift center is assumed at 45% of semi-span
+LIFT_ARM_FACTOR = 0.45
+# Structural Efficiency Factor
+# 0.15 = Optimized Composite/Machined Ribs (Very Strong)
+# 0.10 = Standard Aluminum Construction (Realistic)
+EFFICIENCY_FACTOR = 0.10
+
+# Lift = 0.5 * rho * v^2 * Area * Cl * G-Load
+LIFT_COEFF = 0.5 * AREA_FACTOR * CL_MANEUVER * LOAD_FACTOR_G
+# Root moment = (Lift / 2) * (Span / 2 * 0.45)
+MOMENT_COEFF = 0.5 * 0.5 * LIFT_ARM_FACTOR
+
+
 class SimRequest(BaseModel):
-    material_yield: float    # MPa
-    material_density: float  # kg/m3
-    altitude: float          # m
-    speed: float             # m/s
-    span: float              # m
-    root_chord: float        # m
-    thickness: float         # %
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    material_yield: float = Field(gt=0)                  # MPa
+    material_density: float = Field(gt=0)                # kg/m3
+    altitude: float = Field(ge=-1000, le=100_000)        # m
+    speed: float = Field(ge=0)                           # m/s
+    span: float = Field(gt=0)                            # m
+    root_chord: float = Field(gt=0)                      # m
+    thickness: float = Field(gt=0, le=100)               # %
+
+
+@njit(cache=True)
+def _simulate(material_yield, altitude, speed, span, chord, thickness):
+    """
+    Structural physics kernel: returns
+    (safety_factor, bending_stress_mpa, lift_force, rho, dynamic_pressure).
+    """
+    # 1. ATMOSPHERIC PHYSICS
+    # Standard Atmosphere: density drops with altitude.
+    # math.exp is kept deliberately: a low-order polynomial cannot stay within 0.1%
+    # over the accepted altitude range, and under numba exp compiles to a libm call.
+    rho = SEA_LEVEL_DENSITY * math.exp(-altitude * INV_SCALE_HEIGHT)
+
+    # 2. AERODYNAMIC LOADS (dynamic pressure 0.5 * rho * v^2)
+    v2 = speed * speed
+    dynamic_pressure = 0.5 * rho * v2
+
+    # Total design load to withstand (Newtons)
+    lift_force = LIFT_COEFF * rho * v2 * span * chord
+
+    # 3-5. CANTILEVER ROOT MOMENT / SECTION MODULUS -> STRESS
+    # Z ≈ Efficiency * Chord * Thickness^2, thickness in meters
+    t_meters = chord * thickness * 0.01
+    section_modulus = EFFICIENCY_FACTOR * chord * t_meters * t_meters
+    if section_modulus <= 0.000001:
+        bending_stress_mpa = 999.999999
+    else:
+        bending_stress_mpa = MOMENT_COEFF * lift_force * span / section_modulus * 1e-6
+
+    # 6. SAFETY FACTOR (capped at 100)
+    if bending_stress_mpa <= 0.001:
+        safety_factor = 100.0
+    else:
+        safety_factor = min(material_yield / bending_stress_mpa, 100.0)
+
+    return safety_factor, bending_stress_mpa, lift_force, rho, dynamic_pressure
+
+
 @router.post("/structural")
 async def run_structural_simulation(req: SimRequest):
     """
     Run a rigorous structural analysis using Beam Theory.
     Simulates a 2.5G Limit Load Maneuver (FAA Standard).
+    Invalid inputs are rejected with a 422 by SimRequest's field constraints.
     """
-    try:
-        # 1. ATMOSPHERIC PHYSICS
-        # Standard Atmosphere: density drops with altitude
-        rho = 1.225 * math.exp(-req.altitude / 8500)
-        
-        # 2. AERODYNAMIC LOADS
-        # Estimate Wing Area (Trapezoidal approx)
-        area = req.span * req.root_chord * 0.85 
-        
-        # --- PHYSICS FIX: LOAD FACTOR ---
-        # Previous version used 1.2 (Cruise). 
-        # Real structural testing uses Limit Load Factor (2.5G for Transport/Commercial)
-        # This effectively multiplies the force by ~2.1x compared to before.
-        load_factor_g = 2.5 
-        
-        # Lift Coefficient (Cl) during high-G pull up
-        cl_maneuver = 1.5 
-        
-        # Total Lift Force = Dynamic Pressure * Area * Cl * G-Load
-        # 0.5 * rho * v^2
-        dynamic_pressure = 0.5 * rho * (req.speed ** 2)
-        
-        # Total design load to withstand (Newtons)
-        lift_force = dynamic_pressure * area * cl_maneuver * load_factor_g
-        
-        # 3. STRUCTURAL MECHANICS (Cantilever Beam)
-        # Moment at root. We assume lift center is at 45% of semi-span.
-        moment = (lift_force / 2) * (req.span / 2 * 0.45)
-        
-        # 4. GEOMETRY & SECTION MODULUS (Z)
-        # Thickness in meters
-        t_meters = req.root_chord * (req.thickness / 100.0)
-        
-        # Structural Efficiency Factor
-        # 0.15 = Optimized Composite/Machined Ribs (Very Strong)
-        # 0.10 = Standard Aluminum Construction (Realistic)
-        efficiency_factor = 0.10 # Reduced to make it more realistic/breakable
-        
-        # Z ≈ Efficiency * Chord * Thickness^2
-        section_modulus = efficiency_factor * req.root_chord * (t_meters ** 2)
-        
-        # 5. STRESS CALCULATION
-        if section_modulus <= 0.000001:
-            bending_stress_pa = 999999999
-        else:
-            bending_stress_pa = moment / section_modulus
-            
-        bending_stress_mpa = bending_stress_pa / 1_000_000
-        
-        # 6. SAFETY FACTOR
-        if bending_stress_mpa <= 0.001:
-            safety_factor = 100.0
-        else:
-            safety_factor = req.material_yield / bending_stress_mpa
-            
-        if safety_factor > 100: safety_factor = 100.0
-            
-        # STRICTER PASS/FAIL: 
-        # Aerospace standard requires holding 1.5x the Limit Load
-        status = "PASS" if safety_factor >= 1.5 else "FAIL"
-        
-        return {
-            "success": True,
-            "status": status,
-            "safety_factor": round(safety_factor, 2),
-            "max_stress": round(bending_stress_mpa, 2),
-            "lift_force_kn": round(lift_force / 1000, 1),
-            "details": {
-                "air_density": round(rho, 4),
-                "dynamic_pressure": round(dynamic_pressure, 0)
-            }
-        }
+    safety_factor, bending_stress_mpa, lift_force, rho, dynamic_pressure = _simulate(
+        req.material_yield, req.altitude, req.speed,
+        req.span, req.root_chord, req.thickness
+    )
 
-    except Exception as e:
-        print(f"Simulation error: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
\ No newline at end of file
+    # STRICTER PASS/FAIL:
+    # Aerospace standard requires holding 1.5x the Limit Load
+    status = "PASS" if safety_factor >= 1.5 else "FAIL"
+
+    # Pre-serialized Response: skips FastAPI's response inspection entirely
+    payload = orjson.dumps({
+        "success": True,
+        "status": status,
+        "safety_factor": round(safety_factor, 2),
+        "max_stress": round(bending_stress_mpa, 2),
+        "lift_force_kn": round(lift_force / 1000, 1),
+        "details": {
+            "air_density": round(rho, 4),
+            "dynamic_pressure": round(dynamic_pressure, 0)
+        }
+    })
+    return Response(content=payload, media_type="application/json")
@@ -19,6 +19,9 @@ class Settings(BaseSettings):
     upload_dir: str = "uploads"
     max_upload_size: int = 10485760  # 10MB
 
+    # Export requests (JSON mesh bodies, including normals); checked before the body buffer is allocated
+    max_export_body_size: int = 268435456  # 256MB
+
     class Config:
         env_file = ".env"
         case_sensitive = False
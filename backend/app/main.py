@@ -1,17 +1,38 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi import Request
 import traceback
+import orjson
 from app.core import settings
 from app.api import generation_router, export_router, images_router, simulation_router # <--- ADD IMPORT
 
+def warm_up():
+    """Prime lazy imports, caches and the simulation JIT before the first request."""
+    import numpy as np
+    import trimesh
+    from app.api.simulation import _simulate
+
+    mesh = trimesh.Trimesh(np.eye(3), np.array([[0, 1, 2]]), process=False)
+    mesh.export(file_type='stl_ascii')
+    # Triggers numba compilation (or loads its on-disk cache) when numba is installed
+    _simulate(400.0, 1000.0, 200.0, 10.0, 2.0, 12.0)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up()
+    yield
+
+
 # Create FastAPI app
 app = FastAPI(
     title="FutureCraft API",
     description="AI-Powered Aerospace CAD Web Application",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -54,21 +75,23 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
+    return Response(content=orjson.dumps({
         "message": "FutureCraft API",
         "version": "0.1.0",
         "docs": "/docs"
-    }
+    }), media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return Response(content=orjson.dumps({"status": "healthy"}), media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
+    # Uvicorn already formats the Date/Server headers once per second and reuses
+    # them for every response, so no per-request date middleware is needed here.
     uvicorn.run(
         "app.main:app",
         host=settings.host,
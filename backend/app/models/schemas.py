@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Literal
 from datetime import datetime
 import uuid
@@ -34,10 +34,25 @@ class AeroParameters(BaseModel):
 
 class GeometryData(BaseModel):
     """3D geometry data"""
-    vertices: list[float]
-    indices: list[int]
+    vertices: list[float] = Field(default_factory=list)
+    indices: list[int] = Field(default_factory=list)
     normals: Optional[list[float]] = None
 
+    # Packed alternative: base64 of little-endian float32 vertices/normals, uint32 indices
+    vertices_b64: Optional[str] = None
+    indices_b64: Optional[str] = None
+    normals_b64: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_encoding(self):
+        """Require both packed buffers, or (when unpacked) both number lists."""
+        has_vertices_b64 = self.vertices_b64 is not None
+        if has_vertices_b64 != (self.indices_b64 is not None):
+            raise ValueError("vertices_b64 and indices_b64 must be provided together")
+        if not has_vertices_b64 and not {'vertices', 'indices'} <= self.model_fields_set:
+            raise ValueError("vertices and indices are required when geometry is not packed")
+        return self
+
 
 class ModelMetadata(BaseModel):
     """Model metadata"""
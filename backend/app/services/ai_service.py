@@ -2,11 +2,21 @@ import json
 import sys
 import os
 import time
+import copy
+import hashlib
+from collections import OrderedDict
 from cerebras.cloud.sdk import Cerebras
 from app.core import settings
 from app.models import AeroParameters
 
 
+# LRU + TTL cache of successful assembly calculations. Positioning is a pure
+# function of the component parameters, so identical compiles skip the LLM call.
+ASSEMBLY_CACHE_SIZE = 1024
+ASSEMBLY_CACHE_TTL = 3600  # seconds
+_assembly_cache: OrderedDict = OrderedDict()
+
+
 class AIService:
     def __init__(self):
         # Initialize Cerebras client with API key from environment or settings
@@ -288,6 +298,16 @@ Return precise positioning data as JSON."""
         fuselage_params = components_data.get('fuselage', {}).get('parameters', {})
         engines_params = components_data.get('engines', {}).get('parameters', {})
 
+        cache_key = hashlib.blake2b(
+            json.dumps([wings_params, fuselage_params, engines_params], sort_keys=True, default=str).encode(),
+            digest_size=16
+        ).hexdigest()
+        cached = _assembly_cache.get(cache_key)
+        if cached is not None and time.time() - cached[0] < ASSEMBLY_CACHE_TTL:
+            _assembly_cache.move_to_end(cache_key)
+            print("[AI] calculate_intelligent_assembly: cache hit", file=sys.stderr)
+            return copy.deepcopy(cached[1])
+
         user_prompt = f"""Analyze these aircraft components and calculate optimal assembly positioning:
 
 WINGS:
@@ -360,6 +380,12 @@ Return JSON with this exact structure:
             assembly_data = json.loads(content)
             print(f"AI calculated assembly positioning: {assembly_data}")
 
+            # Only successful responses are cached; fallbacks are retried next time
+            _assembly_cache[cache_key] = (time.time(), copy.deepcopy(assembly_data))
+            _assembly_cache.move_to_end(cache_key)
+            while len(_assembly_cache) > ASSEMBLY_CACHE_SIZE:
+                _assembly_cache.popitem(last=False)
+
             return assembly_data
 
         except Exception as e:
@@ -1,10 +1,35 @@
 import trimesh
 import numpy as np
-from io import BytesIO
+import base64
+import struct
+import threading
+from collections import OrderedDict
 from app.models import Model3D, ExportOptions
 import traceback
 
 
+# Binary STL facet record: normal, 3 vertices, attribute byte count (50 bytes)
+_STL_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attr', '<u2'),
+])
+
+# LRU cache of exported STL results keyed by (id(model.geometry), ascii, inspect).
+# Keyed by the geometry object rather than the client-controlled model.id, and each
+# entry holds that object so the id cannot be reused while cached.
+# Exports may run in a threadpool, so access is guarded by a lock.
+_STL_CACHE_SIZE = 16
+_stl_cache: OrderedDict = OrderedDict()
+_stl_cache_lock = threading.Lock()
+
+# LRU cache of reconstructed (vertices, faces) arrays keyed by id(model.geometry).
+# Each entry holds a reference to its geometry object, so the id cannot be reused while cached.
+_MESH_CACHE_SIZE = 8
+_mesh_cache: OrderedDict = OrderedDict()
+_mesh_cache_lock = threading.Lock()
+
+
 class ExportService:
     def export_stl(self, model: Model3D, options: ExportOptions | dict = None):
         """
@@ -23,67 +48,161 @@ class ExportService:
             except Exception:
                 opts = {}
 
-        # Reconstruct trimesh from model geometry
+        # Determine ASCII vs binary based on options. ExportOptions.binary==True => binary.
+        ascii_flag = False
+        inspect_flag = False
+        if isinstance(opts, dict):
+            # If client explicitly requests non-binary (binary=false) we export ASCII
+            ascii_flag = not bool(opts.get('binary', True))
+            inspect_flag = bool(opts.get('inspect', False))
+
+        # Repeat exports of the same model (inspect -> download -> re-download) hit the cache
+        geometry = model.geometry
+        cache_key = (id(geometry), ascii_flag, inspect_flag)
+        with _stl_cache_lock:
+            entry = _stl_cache.get(cache_key)
+            if entry is not None and entry[0] is geometry:
+                _stl_cache.move_to_end(cache_key)
+                return entry[1]
+
+        # Reconstruct geometry arrays (and a trimesh only where it is actually used)
+        mesh = None
         try:
-            # Accept either a flat list [x,y,z,...] or nested [[x,y,z], ...]
-            verts = np.array(model.geometry.vertices, dtype=np.float64)
-            if verts.ndim == 1:
-                if verts.size % 3 != 0:
-                    raise ValueError(f"Vertices length {verts.size} is not divisible by 3")
-                vertices = verts.reshape(-1, 3)
-            elif verts.ndim == 2 and verts.shape[1] == 3:
-                vertices = verts
-            else:
-                raise ValueError(f"Unsupported vertices shape: {verts.shape}")
-
-            idx = np.array(model.geometry.indices, dtype=np.int64)
-            if idx.ndim == 1:
-                if idx.size % 3 != 0:
-                    raise ValueError(f"Indices length {idx.size} is not divisible by 3")
-                faces = idx.reshape(-1, 3)
-            elif idx.ndim == 2 and idx.shape[1] == 3:
-                faces = idx
-            else:
-                raise ValueError(f"Unsupported indices shape: {idx.shape}")
-
-            mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
+            vertices, faces = self._geometry_arrays(geometry)
+            if ascii_flag or inspect_flag:
+                # Serve the mesh as-is: skip merge/dedupe post-processing
+                mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False, validate=False)
         except Exception as e:
             # Log full traceback for diagnosis and re-raise
             print(f"[EXPORT SERVICE] Failed to reconstruct mesh: {e}")
             traceback.print_exc()
             raise
 
-        # Export to BytesIO
-        output = BytesIO()
-        # Determine ASCII vs binary based on options. ExportOptions.binary==True => binary.
-        ascii_flag = False
-        if isinstance(opts, dict):
-            # If client explicitly requests non-binary (binary=false) we export ASCII
-            ascii_flag = not bool(opts.get('binary', True))
-
-        # Call export with the file_obj kw only. If ascii_flag is True, request ASCII export
         if ascii_flag:
-            mesh.export(file_obj=output, file_type='stl', ascii=True)
+            # ASCII export still goes through trimesh, which returns the text directly
+            stl_bytes = mesh.export(file_type='stl_ascii').encode('utf-8')
         else:
-            mesh.export(file_obj=output, file_type='stl')
-        output.seek(0)
+            stl_bytes = self._binary_stl_bytes(vertices, faces)
+
+        # If inspect flag set in options, return both bytes and metadata for the caller to format.
+        # Metadata (notably is_watertight) is only computed when actually requested.
+        if inspect_flag:
+            metadata = {
+                'vertices': int(vertices.shape[0]),
+                'faces': int(faces.shape[0]),
+                'bounds_min': mesh.bounds[0].tolist() if hasattr(mesh, 'bounds') else None,
+                'bounds_max': mesh.bounds[1].tolist() if hasattr(mesh, 'bounds') else None,
+                'is_watertight': bool(mesh.is_watertight) if hasattr(mesh, 'is_watertight') else None,
+            }
+            result = (stl_bytes, metadata)
+        else:
+            result = stl_bytes
 
-        stl_bytes = output.getvalue()
+        with _stl_cache_lock:
+            _stl_cache[cache_key] = (geometry, result)
+            _stl_cache.move_to_end(cache_key)
+            while len(_stl_cache) > _STL_CACHE_SIZE:
+                _stl_cache.popitem(last=False)
 
-        # Prepare lightweight metadata useful for debugging/inspection
-        metadata = {
-            'vertices': int(vertices.shape[0]),
-            'faces': int(faces.shape[0]),
-            'bounds_min': mesh.bounds[0].tolist() if hasattr(mesh, 'bounds') else None,
-            'bounds_max': mesh.bounds[1].tolist() if hasattr(mesh, 'bounds') else None,
-            'is_watertight': bool(mesh.is_watertight) if hasattr(mesh, 'is_watertight') else None,
-        }
+        return result
 
-        # If inspect flag set in options, return both bytes and metadata for the caller to format
-        if isinstance(opts, dict) and bool(opts.get('inspect', False)):
-            return stl_bytes, metadata
+    def clear_stl_cache(self) -> None:
+        """
+        Drop all cached STL exports (called when the server-side model changes).
+        """
+        with _stl_cache_lock:
+            _stl_cache.clear()
 
-        return stl_bytes
+    def _binary_stl_bytes(self, vertices: np.ndarray, faces: np.ndarray) -> bytes:
+        """
+        Serialize a triangle mesh to binary STL through one preallocated structured buffer.
+        """
+        triangles = vertices[faces]
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        # Degenerate (zero-area) faces get a zero normal instead of NaN
+        np.divide(normals, lengths, out=normals, where=lengths > 0)
+
+        # One buffer sized 84 + 50 * N: header, facet count, then facet records
+        buffer = bytearray(84 + _STL_DTYPE.itemsize * len(faces))
+        struct.pack_into('<80sI', buffer, 0, b'', len(faces))
+        records = np.frombuffer(buffer, dtype=_STL_DTYPE, offset=84)
+        records['normal'] = normals
+        records['vertices'] = triangles
+
+        return bytes(buffer)
+
+    def _geometry_arrays(self, geometry) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Convert model geometry to (N, 3) vertex and (F, 3) face arrays.
+        Results are cached so exporting the same model to several formats
+        reconstructs the arrays only once.
+        """
+        key = id(geometry)
+        with _mesh_cache_lock:
+            entry = _mesh_cache.get(key)
+            if entry is not None and entry[0] is geometry:
+                _mesh_cache.move_to_end(key)
+                return entry[1], entry[2]
+
+        vertices, faces = self._build_geometry_arrays(geometry)
+        # Cached arrays are shared between requests: guard against in-place edits
+        vertices.flags.writeable = False
+        faces.flags.writeable = False
+
+        with _mesh_cache_lock:
+            _mesh_cache[key] = (geometry, vertices, faces)
+            _mesh_cache.move_to_end(key)
+            while len(_mesh_cache) > _MESH_CACHE_SIZE:
+                _mesh_cache.popitem(last=False)
+
+        return vertices, faces
+
+    def _build_geometry_arrays(self, geometry) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Packed base64 buffers (float32 vertices, uint32 indices) are decoded
+        with np.frombuffer; otherwise the JSON lists are converted.
+        Malformed geometry raises ValueError.
+        """
+        vertices_b64 = getattr(geometry, 'vertices_b64', None)
+        indices_b64 = getattr(geometry, 'indices_b64', None)
+        if (vertices_b64 is None) != (indices_b64 is None):
+            raise ValueError("vertices_b64 and indices_b64 must be provided together")
+
+        try:
+            if vertices_b64 is not None:
+                verts = np.frombuffer(base64.b64decode(vertices_b64), dtype='<f4')
+                idx = np.frombuffer(base64.b64decode(indices_b64), dtype='<u4')
+            else:
+                # Accept either a flat list [x,y,z,...] or nested [[x,y,z], ...]
+                verts = np.array(geometry.vertices, dtype=np.float64)
+                idx = np.array(geometry.indices, dtype=np.int64)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Geometry is not numeric: {e}") from e
+
+        if verts.ndim == 1:
+            if verts.size % 3 != 0:
+                raise ValueError(f"Vertices length {verts.size} is not divisible by 3")
+            vertices = verts.reshape(-1, 3)
+        elif verts.ndim == 2 and verts.shape[1] == 3:
+            vertices = verts
+        else:
+            raise ValueError(f"Unsupported vertices shape: {verts.shape}")
+
+        if idx.ndim == 1:
+            if idx.size % 3 != 0:
+                raise ValueError(f"Indices length {idx.size} is not divisible by 3")
+            faces = idx.reshape(-1, 3)
+        elif idx.ndim == 2 and idx.shape[1] == 3:
+            faces = idx
+        else:
+            raise ValueError(f"Unsupported indices shape: {idx.shape}")
+
+        # Negative indices would silently wrap in numpy fancy indexing
+        if faces.size and (faces.min() < 0 or faces.max() >= len(vertices)):
+            raise ValueError(f"Face indices must be in [0, {len(vertices)})")
+
+        return vertices, faces
 
     def export_step(self, model: Model3D, options: ExportOptions = None) -> bytes:
         """
@@ -113,16 +232,12 @@ class ExportService:
         """
         Export model to OBJ format (additional format).
         """
-        vertices = np.array(model.geometry.vertices).reshape(-1, 3)
-        faces = np.array(model.geometry.indices).reshape(-1, 3)
-
-        mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
+        vertices, faces = self._geometry_arrays(model.geometry)
 
-        output = BytesIO()
-        mesh.export(file_obj=output, file_type='obj')
-        output.seek(0)
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False, validate=False)
 
-        return output.getvalue()
+        # trimesh returns the OBJ text directly when no file_obj is given
+        return mesh.export(file_type='obj').encode('utf-8')
 
 
 export_service = ExportService()
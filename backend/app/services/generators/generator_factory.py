@@ -31,6 +31,10 @@ class GeneratorFactory:
         """
         Create a generator for the specified component type.
 
+        Returns the shared instance registered for the type; nothing is constructed
+        per call, so callers should not cache the result (a cache would also miss
+        later register_generator() calls).
+
         Args:
             component_type: Type of component ('wing', 'fuselage', 'engine')
 
@@ -2,11 +2,17 @@
 Refactored Geometry Service using SOLID principles.
 Delegates component generation to specialized generators.
 """
+import asyncio
+import gc
 import numpy as np
 import trimesh
+from math import pi as _PI
 from typing import Tuple
 from app.models import AeroParameters, GeometryData, Model3D, ModelMetadata
+from app.core import settings
 from datetime import datetime
+import base64
+import re
 import uuid
 import sys
 
@@ -16,6 +22,132 @@ from app.services.generators import GeneratorFactory
 from app.services import ai_service
 
 
+# Constant engine orientation used by compile_aircraft_components: 90 degrees about y
+_ROT_Y_90 = trimesh.transformations.rotation_matrix(np.radians(90), [0, 1, 0])
+_ROT_Y_90.flags.writeable = False
+
+# Prompt keywords -> component type, matched in one regex pass over the prompt.
+# When several types are mentioned, _TYPE_PRIORITY decides which one wins.
+_TYPE_KEYWORDS = {
+    'fuselage': 'fuselage',
+    'body': 'fuselage',
+    'engine': 'engine',
+    'nacelle': 'engine',
+    'turbine': 'engine',
+    'wing': 'wing',
+}
+_TYPE_PRIORITY = ('fuselage', 'engine', 'wing')
+_TYPE_RE = re.compile('|'.join(_TYPE_KEYWORDS))
+
+# A full gc.collect runs on the event-loop thread, so it is scheduled off the
+# request path and at most once per _GC_MIN_INTERVAL seconds
+_GC_DELAY = 0.5
+_GC_MIN_INTERVAL = 60.0
+_next_gc_at = 0.0
+
+
+def _schedule_gc() -> None:
+    """Schedule a full collection shortly after this request, rate-limited by _GC_MIN_INTERVAL."""
+    global _next_gc_at
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    if now < _next_gc_at:
+        return
+    _next_gc_at = now + _GC_MIN_INTERVAL
+    loop.call_later(_GC_DELAY, gc.collect)
+
+
+def _pack_array(array: np.ndarray, dtype: str) -> str:
+    """Base64-encode an array as a flat little-endian buffer of the given dtype."""
+    return base64.b64encode(np.ascontiguousarray(array, dtype=dtype).tobytes()).decode('ascii')
+
+
+def _indexed_dict_to_list(data: dict) -> list:
+    """
+    Rebuild a list from a JSON-round-tripped {"0": v0, "1": v1, ...} dict in one
+    O(N) pass (no key sort). Deprecated payload shape: clients should send lists.
+
+    Raises ValueError unless the keys are exactly "0" .. str(len(data) - 1).
+    """
+    count = len(data)
+    items = [None] * count
+    filled = [False] * count
+    for key, value in data.items():
+        try:
+            index = int(key)
+        except (TypeError, ValueError):
+            raise ValueError(f"Geometry key {key!r} is not an integer index")
+        if not 0 <= index < count or filled[index]:
+            raise ValueError(f"Geometry keys must be exactly 0..{count - 1}; got {key!r}")
+        items[index] = value
+        filled[index] = True
+    return items
+
+
+def _to_verts(data) -> np.ndarray:
+    """(N, 3) float32 vertex array; an input already in that form is returned as-is."""
+    if isinstance(data, np.ndarray) and data.dtype == np.float32 and data.ndim == 2 and data.shape[1] == 3:
+        return data
+    return np.ascontiguousarray(data, dtype=np.float32).reshape(-1, 3)
+
+
+def _to_faces(data) -> np.ndarray:
+    """(F, 3) int32 face array; an input already in that form is returned as-is."""
+    if isinstance(data, np.ndarray) and data.dtype == np.int32 and data.ndim == 2 and data.shape[1] == 3:
+        return data
+    return np.ascontiguousarray(data, dtype=np.int32).reshape(-1, 3)
+
+
+def _fast_concat(meshes: list) -> trimesh.Trimesh:
+    """
+    Concatenate meshes into one preallocated vertex/face buffer, offsetting face
+    indices per mesh, without trimesh.util.concatenate's per-call validation.
+    """
+    vertex_counts = [len(m.vertices) for m in meshes]
+    face_counts = [len(m.faces) for m in meshes]
+
+    vertices = np.empty((sum(vertex_counts), 3), dtype=np.float64)
+    faces = np.empty((sum(face_counts), 3), dtype=np.int64)
+
+    np.concatenate([m.vertices for m in meshes], out=vertices)
+    v_offset = 0
+    f_offset = 0
+    for m, v_count, f_count in zip(meshes, vertex_counts, face_counts):
+        np.add(m.faces, v_offset, out=faces[f_offset:f_offset + f_count])
+        v_offset += v_count
+        f_offset += f_count
+
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=False, validate=False)
+
+
+def _geometry_from_mesh(mesh: trimesh.Trimesh, packed: bool = False) -> GeometryData:
+    """
+    Convert a mesh to GeometryData.
+
+    Packed geometry carries base64 float32/uint32 buffers instead of JSON number
+    lists, avoiding per-element Python boxing and shrinking the payload ~4x.
+    """
+    try:
+        normals = mesh.vertex_normals
+    except Exception:
+        normals = None
+
+    # Fields are built here from mesh arrays and already have the declared types,
+    # so model_construct skips pydantic's per-element re-validation of the lists
+    if packed:
+        return GeometryData.model_construct(
+            vertices_b64=_pack_array(mesh.vertices, '<f4'),
+            indices_b64=_pack_array(mesh.faces, '<u4'),
+            normals_b64=_pack_array(normals, '<f4') if normals is not None and len(normals) else None
+        )
+
+    return GeometryData.model_construct(
+        vertices=mesh.vertices.ravel().tolist(),
+        indices=mesh.faces.ravel().tolist(),
+        normals=normals.ravel().tolist() if normals is not None and len(normals) else None
+    )
+
+
 class GeometryService:
     """
     Service for creating 3D geometry models.
@@ -40,7 +172,8 @@ class GeometryService:
         self,
         params: AeroParameters,
         source_prompt: str = None,
-        generated_from: str = "text"
+        generated_from: str = "text",
+        packed_geometry: bool = False
     ) -> Model3D:
         """
         Create a complete Model3D from parameters.
@@ -49,6 +182,7 @@ class GeometryService:
             params: Component parameters
             source_prompt: Original text prompt (optional)
             generated_from: Generation source ("text", "manual", etc.)
+            packed_geometry: Emit base64-packed geometry instead of number lists
 
         Returns:
             Model3D: Complete 3D model with geometry and metadata
@@ -56,8 +190,9 @@ class GeometryService:
         # Determine component type and get appropriate generator
         component_type = self._determine_component_type(params, source_prompt)
 
-        print(f"DEBUG: source_prompt='{source_prompt}'", file=sys.stderr, flush=True)
-        print(f"DEBUG: determined component_type='{component_type}'", file=sys.stderr, flush=True)
+        if settings.debug:
+            print(f"DEBUG: source_prompt='{source_prompt}'", file=sys.stderr, flush=True)
+            print(f"DEBUG: determined component_type='{component_type}'", file=sys.stderr, flush=True)
 
         # Get generator from factory
         generator = self.generator_factory.create(component_type)
@@ -66,10 +201,12 @@ class GeometryService:
             raise ValueError(f"No generator available for component type: {component_type}")
 
         # Generate mesh using specialized generator
-        print(f"DEBUG: Generating {component_type.upper()} mesh using {generator.__class__.__name__}", file=sys.stderr, flush=True)
+        if settings.debug:
+            print(f"DEBUG: Generating {component_type.upper()} mesh using {generator.__class__.__name__}", file=sys.stderr, flush=True)
         mesh = generator.generate(params)
 
         # 1. Try to calculate volume from the 3D mesh
+        volume = 0.0
         try:
             if mesh.is_watertight:
                 volume = mesh.volume
@@ -83,13 +220,13 @@ class GeometryService:
             print("Using parametric fallback for volume...")
             if component_type == "fuselage" and params.fuselage_length and params.fuselage_diameter:
                 # Fuselage ≈ Cylinder Volume (approx 70% fill due to taper)
-                radius = params.fuselage_diameter / 2
-                volume = 3.14159 * (radius ** 2) * params.fuselage_length * 0.7
+                d = params.fuselage_diameter
+                volume = _PI * (d * d * 0.25) * params.fuselage_length * 0.7
                 
             elif component_type == "engine" and params.engine_length and params.engine_diameter:
                 # Engine ≈ Cylinder Volume (approx 50% fill due to being hollow)
-                radius = params.engine_diameter / 2
-                volume = 3.14159 * (radius ** 2) * params.engine_length * 0.5
+                d = params.engine_diameter
+                volume = _PI * (d * d * 0.25) * params.engine_length * 0.5
                 
             else: # Wing
                 # Wing ≈ Span * MeanChord * AvgThickness * AirfoilFactor
@@ -107,23 +244,20 @@ class GeometryService:
         # ----------------------------------------
 
         # Convert to geometry data
-        geometry = GeometryData(
-            vertices=mesh.vertices.flatten().tolist(),
-            indices=mesh.faces.flatten().tolist(),
-            normals=mesh.vertex_normals.flatten().tolist()
-        )
+        geometry = _geometry_from_mesh(mesh, packed=packed_geometry)
 
-        # Create metadata
+        # Create metadata (one clock read: created_at == updated_at)
+        now = datetime.now()
         metadata = ModelMetadata(
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
+            created_at=now,
+            updated_at=now,
             generated_from=generated_from,
             source_prompt=source_prompt,
             volume=volume
         )
 
         # Determine component name
-        component_name = self._determine_component_name(params, source_prompt)
+        component_name = self._determine_component_name(component_type, params)
 
         # Create model
         model = Model3D(
@@ -151,12 +285,10 @@ class GeometryService:
         prompt_lower = (source_prompt or "").lower()
 
         # Check prompt for explicit component type keywords (highest priority)
-        if "fuselage" in prompt_lower or "body" in prompt_lower:
-            return "fuselage"
-        elif "engine" in prompt_lower or "nacelle" in prompt_lower or "turbine" in prompt_lower:
-            return "engine"
-        elif "wing" in prompt_lower or "wings" in prompt_lower:
-            return "wing"
+        mentioned = {_TYPE_KEYWORDS[kw] for kw in _TYPE_RE.findall(prompt_lower)}
+        for component_type in _TYPE_PRIORITY:
+            if component_type in mentioned:
+                return component_type
 
         # MODULAR APPROACH: Check for ENGINE parameters (engine_length, engine_diameter)
         if params.engine_length and params.engine_diameter:
@@ -175,19 +307,17 @@ class GeometryService:
         # Default to wing
         return "wing"
 
-    def _determine_component_name(self, params: AeroParameters, source_prompt: str = None) -> str:
+    def _determine_component_name(self, component_type: str, params: AeroParameters) -> str:
         """
-        Determine the component name based on parameters and source prompt.
+        Determine the component name for an already-resolved component type.
 
         Args:
+            component_type: Component type from _determine_component_type
             params: Component parameters
-            source_prompt: Original text prompt (optional)
 
         Returns:
             str: Human-readable component name
         """
-        component_type = self._determine_component_type(params, source_prompt)
-
         if component_type == "fuselage":
             fuselage_type = (params.fuselage_type or "commercial").capitalize()
             return f"{fuselage_type} Fuselage"
@@ -198,7 +328,7 @@ class GeometryService:
 
     
 
-    async def compile_aircraft_components(self, components: list, component_names: list, aircraft_data: dict = None) -> Model3D:
+    async def compile_aircraft_components(self, components: list, component_names: list, aircraft_data: dict = None, packed_geometry: bool = False) -> Model3D:
             """
             Compile multiple aircraft components into a single unified model.
             Uses AI to calculate optimal positioning with interference checking.
@@ -226,17 +356,18 @@ class GeometryService:
                     vertices_data = geometry.vertices if hasattr(geometry, 'vertices') else geometry
                     indices_data = geometry.indices if hasattr(geometry, 'indices') else geometry
 
-                # Handle case where vertices/indices are dicts with string keys (from JSON)
+                # Lists are the expected shape; index-keyed dicts (from JSON-serialized
+                # typed arrays) are still accepted but deprecated
                 if isinstance(vertices_data, dict):
-                    vertices_list = [vertices_data[str(i)] for i in sorted([int(k) for k in vertices_data.keys()])]
-                    vertices_data = vertices_list
+                    print("[COMPILE] Deprecated: vertices sent as an index-keyed dict; send a list", file=sys.stderr)
+                    vertices_data = _indexed_dict_to_list(vertices_data)
 
                 if isinstance(indices_data, dict):
-                    indices_list = [indices_data[str(i)] for i in sorted([int(k) for k in indices_data.keys()])]
-                    indices_data = indices_list
+                    print("[COMPILE] Deprecated: indices sent as an index-keyed dict; send a list", file=sys.stderr)
+                    indices_data = _indexed_dict_to_list(indices_data)
 
-                vertices = np.array(vertices_data, dtype=np.float32).reshape(-1, 3)
-                indices = np.array(indices_data, dtype=np.int32).reshape(-1, 3)
+                vertices = _to_verts(vertices_data)
+                indices = _to_faces(indices_data)
 
                 # Create mesh
                 mesh = trimesh.Trimesh(vertices=vertices, faces=indices)
@@ -271,78 +402,75 @@ class GeometryService:
 
             # 2. Wings
             if wings_mesh:
-                wing_offset_x = assembly_data.get('wing_attachment', {}).get('position_x', 0)
-                wing_offset_y = assembly_data.get('wing_attachment', {}).get('position_y', 0)
-                wing_offset_z = assembly_data.get('wing_attachment', {}).get('position_z', 0)
-
-                # Right wing
-                translation_right = trimesh.transformations.translation_matrix([wing_offset_x, wing_offset_y, wing_offset_z])
-                wing_right = wings_mesh.copy()
-                wing_right.apply_transform(translation_right)
-                positioned_meshes.append(wing_right)
+                wing_attachment = assembly_data.get('wing_attachment') or {}
+                wing_offset_x, wing_offset_y, wing_offset_z = (
+                    wing_attachment.get('position_x', 0),
+                    wing_attachment.get('position_y', 0),
+                    wing_attachment.get('position_z', 0),
+                )
 
-                # Left wing (mirror)
-                wing_left = wings_mesh.copy()
-                mirror_matrix = np.diag([1, -1, 1, 1])
-                wing_left.apply_transform(mirror_matrix)
-                translation_left = trimesh.transformations.translation_matrix([wing_offset_x, -wing_offset_y, wing_offset_z])
-                wing_left.apply_transform(translation_left)
+                # Left wing (mirror): negate y and translate in one pass over a vertex copy,
+                # reversing the winding so the mirrored faces still point outward
+                left_vertices = wings_mesh.vertices.copy()
+                left_vertices[:, 1] *= -1.0
+                left_vertices += (wing_offset_x, -wing_offset_y, wing_offset_z)
+                wing_left = trimesh.Trimesh(
+                    vertices=left_vertices, faces=wings_mesh.faces[:, ::-1], process=False, validate=False
+                )
+
+                # Right wing: reuse the source mesh, translating in place only when needed
+                wing_right = wings_mesh
+                if wing_offset_x or wing_offset_y or wing_offset_z:
+                    wing_right.apply_transform(trimesh.transformations.translation_matrix([wing_offset_x, wing_offset_y, wing_offset_z]))
+                positioned_meshes.append(wing_right)
                 positioned_meshes.append(wing_left)
 
             # 3. Engines
             if engines_mesh:
-                engine_offset_x = assembly_data.get('engine_attachment', {}).get('position_x', 0)
-                engine_offset_y = assembly_data.get('engine_attachment', {}).get('position_y', 0)
-                engine_offset_z = assembly_data.get('engine_attachment', {}).get('position_z', 0)
-
-                rotation_matrix = trimesh.transformations.rotation_matrix(np.radians(90), [0, 1, 0])
+                engine_attachment = assembly_data.get('engine_attachment') or {}
+                engine_offset_x, engine_offset_y, engine_offset_z = (
+                    engine_attachment.get('position_x', 0),
+                    engine_attachment.get('position_y', 0),
+                    engine_attachment.get('position_z', 0),
+                )
 
-                # Left engine
+                # Left engine: rotate + translate composed into one transform
                 translation_left = trimesh.transformations.translation_matrix([engine_offset_x, engine_offset_y, engine_offset_z])
                 engine_left = engines_mesh.copy()
-                engine_left.apply_transform(rotation_matrix)
-                engine_left.apply_transform(translation_left)
+                engine_left.apply_transform(translation_left @ _ROT_Y_90)
                 positioned_meshes.append(engine_left)
 
-                # Right engine
+                # Right engine: last use of the source mesh, so transform it in place
                 translation_right = trimesh.transformations.translation_matrix([engine_offset_x, -engine_offset_y, engine_offset_z])
-                engine_right = engines_mesh.copy()
-                engine_right.apply_transform(rotation_matrix)
-                engine_right.apply_transform(translation_right)
+                engine_right = engines_mesh
+                engine_right.apply_transform(translation_right @ _ROT_Y_90)
                 positioned_meshes.append(engine_right)
 
             # Combine all positioned meshes
             if len(positioned_meshes) > 1:
-                combined_mesh = trimesh.util.concatenate(positioned_meshes)
+                combined_mesh = _fast_concat(positioned_meshes)
             elif len(positioned_meshes) == 1:
                 combined_mesh = positioned_meshes[0]
             else:
                 combined_mesh = trimesh.creation.box()
 
             # Convert combined mesh to geometry data
-            all_vertices = combined_mesh.vertices.flatten().tolist()
-            all_indices = combined_mesh.faces.flatten().tolist()
-            
-            try:
-                all_normals = combined_mesh.vertex_normals.flatten().tolist()
-            except:
-                all_normals = []
-
-            combined_geometry = GeometryData(
-                vertices=all_vertices,
-                indices=all_indices,
-                normals=all_normals if all_normals else None
-            )
+            combined_geometry = _geometry_from_mesh(combined_mesh, packed=packed_geometry)
 
-            # Create metadata
+            # Create metadata (one clock read: created_at == updated_at)
+            now = datetime.now()
             metadata = ModelMetadata(
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
+                created_at=now,
+                updated_at=now,
                 generated_from="compilation",
                 source_prompt=f"Compiled aircraft from {len(components)} components: {', '.join(component_names)}",
                 volume=combined_mesh.volume if combined_mesh.is_watertight else combined_mesh.convex_hull.volume
             )
 
+            # Intermediate meshes die with this coroutine; let an occasional full
+            # collection reclaim the reference cycles in trimesh's caches
+            _schedule_gc()
+
             # --- PARAMETER CONVERSION ---
             # Get raw parameters from first component
             raw_params = components[0]['parameters'] if components else {}
@@ -3,6 +3,42 @@ import type { GenerateResponse, AeroParameters, ExportFormat, Model3D } from '$l
 const API_BASE = 'https://pakeezakhalid-ai-championship.hf.space/api';
 // const API_BASE = '/api';
 
+// Ask the backend for base64-packed geometry (float32 vertices/normals, uint32 indices)
+const GEOMETRY_HEADERS = { 'Content-Type': 'application/json', 'X-Geometry-Encoding': 'base64' };
+
+// Decode a base64 little-endian buffer straight into a typed array
+function decodeBase64Array<T>(b64: string, ArrayType: new (buffer: ArrayBuffer) => T): T {
+	const binary = atob(b64);
+	const bytes = new Uint8Array(binary.length);
+	for (let i = 0; i < binary.length; i++) {
+		bytes[i] = binary.charCodeAt(i);
+	}
+	return new ArrayType(bytes.buffer);
+}
+
+// JSON.stringify turns typed arrays into {"0": ...} objects; send component geometry as plain lists
+function serializeAircraft(aircraft: any): any {
+	const out: any = { ...aircraft };
+	for (const key of ['wings', 'fuselage', 'engines']) {
+		const component = aircraft?.[key];
+		const geometry = component?.model?.geometry;
+		if (!geometry) continue;
+		out[key] = {
+			...component,
+			model: {
+				...component.model,
+				geometry: {
+					...geometry,
+					vertices: Array.from(geometry.vertices ?? []),
+					indices: Array.from(geometry.indices ?? []),
+					normals: geometry.normals ? Array.from(geometry.normals) : undefined
+				}
+			}
+		};
+	}
+	return out;
+}
+
 // Helper function to convert backend snake_case to frontend camelCase
 function mapBackendToFrontend(backendData: any): Model3D {
 	const params = backendData.parameters || {};
@@ -28,7 +64,14 @@ function mapBackendToFrontend(backendData: any): Model3D {
 			positionY: params.position_y ?? 0,
 			positionZ: params.position_z ?? 0
 		},
-		geometry: {
+		geometry: backendData.geometry.vertices_b64 ? {
+			// Packed geometry: decode buffers directly into Typed Arrays
+			vertices: decodeBase64Array(backendData.geometry.vertices_b64, Float32Array),
+			indices: decodeBase64Array(backendData.geometry.indices_b64, Uint32Array),
+			normals: backendData.geometry.normals_b64
+				? decodeBase64Array(backendData.geometry.normals_b64, Float32Array)
+				: undefined
+		} : {
 			// Convert arrays to Typed Arrays
 			vertices: backendData.geometry.vertices instanceof Float32Array 
 				? backendData.geometry.vertices 
@@ -81,7 +124,7 @@ class ApiService {
 		try {
 			const response = await fetch(`${API_BASE}/generate/from-text`, {
 				method: 'POST',
-				headers: { 'Content-Type': 'application/json' },
+				headers: GEOMETRY_HEADERS,
 				body: JSON.stringify({ prompt })
 			});
 
@@ -114,7 +157,7 @@ class ApiService {
 			
 			const response = await fetch(`${API_BASE}/generate/update-parameters`, {
 				method: 'POST',
-				headers: { 'Content-Type': 'application/json' },
+				headers: GEOMETRY_HEADERS,
 				body: JSON.stringify({ parameters: backendParams })
 			});
 
@@ -209,8 +252,8 @@ class ApiService {
 		try {
 			const response = await fetch(`${API_BASE}/generate/compile-aircraft`, {
 				method: 'POST',
-				headers: { 'Content-Type': 'application/json' },
-				body: JSON.stringify({ aircraft })
+				headers: GEOMETRY_HEADERS,
+				body: JSON.stringify({ aircraft: serializeAircraft(aircraft) })
 			});
 
 			if (!response.ok) {
@@ -283,7 +326,7 @@ class ApiService {
 		try {
 			const response = await fetch(`${API_BASE}/generate/edit-component`, {
 				method: 'POST',
-				headers: { 'Content-Type': 'application/json' },
+				headers: GEOMETRY_HEADERS,
 				body: JSON.stringify({ prompt, aircraft })
 			});
 
@@ -5,13 +5,18 @@ Usage:
   python tools\inspect_stl.py C:\path\to\file.stl
   python tools\inspect_stl.py C:\path\to\file.stl --ascii-out C:\path\to\out_ascii.stl
   python tools\inspect_stl.py C:\path\to\file.stl --show
+  python tools\inspect_stl.py C:\path\to\file.stl --full
 
 This prints vertex/face counts, bounding box, NaNs, degenerate faces, and whether mesh
 is watertight. It can also write an ASCII STL copy for viewing in Notepad.
+
+Binary STLs are summarized straight from the file (counts, bounds, NaNs, degenerate
+faces) without loading them into trimesh; pass --full for the watertight/winding checks.
 """
 import argparse
 import sys
 import os
+import struct
 from pathlib import Path
 import json
 
@@ -23,6 +28,10 @@ except Exception as e:
     raise
 
 
+# Binary STL facet record: normal, 3 vertices, attribute byte count (50 bytes)
+STL_DTYPE = np.dtype([('n', '<f4', (3,)), ('v', '<f4', (3, 3)), ('attr', '<u2')])
+
+
 def human(n):
     for unit in ['','K','M','G']:
         if abs(n) < 1000.0:
@@ -31,7 +40,59 @@ def human(n):
     return f"{n:.2f}T"
 
 
-def inspect(path: Path, ascii_out: Path | None = None, show: bool = False):
+def binary_triangle_count(path: Path, size: int) -> int | None:
+    """Return the facet count if the file is laid out as a binary STL, else None."""
+    if size < 84:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(80)
+        n_tri = struct.unpack('<I', f.read(4))[0]
+    return n_tri if size == 84 + STL_DTYPE.itemsize * n_tri else None
+
+
+def inspect_binary_fast(path: Path, size: int, n_tri: int):
+    """Report on a binary STL via a memory-mapped structured view, without trimesh."""
+    tris = np.memmap(path, dtype=STL_DTYPE, mode='r', offset=84, shape=(n_tri,))
+    tri_v = tris['v']
+    v = tri_v.reshape(-1, 3)
+    print(f"Triangles: {n_tri}  Vertices (unindexed): {v.shape[0]}")
+
+    print(f"Contains NaNs in vertices? {bool(np.isnan(v).any())}")
+
+    bbox = None
+    if n_tri:
+        bbox = np.stack([v.min(axis=0), v.max(axis=0)])
+        print(f"Bounds min: {bbox[0]} max: {bbox[1]} extent: {bbox[1] - bbox[0]}")
+        print(f"Vertex mean: {v.mean(axis=0, dtype=np.float64)}")
+
+        cross = np.cross(tri_v[:, 1] - tri_v[:, 0], tri_v[:, 2] - tri_v[:, 0])
+        areas = 0.5 * np.linalg.norm(cross, axis=1)
+        print(f"Faces areas: min={areas.min():.6g} max={areas.max():.6g} mean={areas.mean():.6g}")
+        print(f"Degenerate faces (zero area): {int((areas <= 1e-12).sum())}")
+
+    try:
+        summary = {
+            'path': str(path),
+            'size_bytes': size,
+            # Unique vertex count needs welding (--full); record the raw corner count separately
+            'vertices': None,
+            'vertices_unindexed': int(v.shape[0]),
+            'faces': int(n_tri),
+            'bounds_min': bbox[0].tolist() if bbox is not None else None,
+            'bounds_max': bbox[1].tolist() if bbox is not None else None,
+            'is_watertight': None,
+        }
+        json_path = path.with_suffix(path.suffix + '.inspect.json')
+        with open(json_path, 'w', encoding='utf8') as jf:
+            json.dump(summary, jf, indent=2)
+        print(f"Wrote summary JSON: {json_path}")
+    except Exception as e:
+        print(f"Failed to write summary JSON: {e}")
+
+    return 0
+
+
+def inspect(path: Path, ascii_out: Path | None = None, show: bool = False, full: bool = False):
     print(f"Inspecting: {path}")
     if not path.exists():
         print("File not found")
@@ -53,6 +114,11 @@ def inspect(path: Path, ascii_out: Path | None = None, show: bool = False):
     else:
         print("Likely binary STL. Not human-readable in plain text editors.")
 
+    # Fast path: counts/bounds straight from the binary layout, no trimesh load
+    n_tri = binary_triangle_count(path, size)
+    if n_tri is not None and not (full or show or ascii_out):
+        return inspect_binary_fast(path, size, n_tri)
+
     # Load mesh with trimesh
     try:
         mesh = trimesh.load(path, force='mesh')
@@ -103,26 +169,15 @@ def inspect(path: Path, ascii_out: Path | None = None, show: bool = False):
     except Exception as e:
         print(f"Error checking watertight/winding: {e}")
 
+    # Face areas and degenerate faces (mesh.area_faces is cached; computed once)
     try:
         areas = mesh.area_faces
-        small_faces = (areas <= 1e-12).sum() if areas is not None else 'n/a'
-        print(f"Faces areas: min={areas.min():.6g} max={areas.max():.6g} mean={areas.mean():.6g} tiny_count={small_faces}")
+        degenerate_count = int((areas <= 1e-12).sum())
+        print(f"Faces areas: min={areas.min():.6g} max={areas.max():.6g} mean={areas.mean():.6g}")
+        print(f"Degenerate faces (zero area): {degenerate_count}")
     except Exception as e:
         print(f"Failed to compute face areas: {e}")
 
-    # Degenerate faces
-    try:
-        degenerate_count = trimesh.geometry.triangles_area(mesh.triangles).size - np.count_nonzero(trimesh.geometry.triangles_area(mesh.triangles))
-        print(f"Degenerate faces (zero area) approx: {degenerate_count}")
-    except Exception:
-        # fallback: count exactly zero-area faces
-        try:
-            areas = trimesh.triangles.area(mesh.triangles)
-            degenerate_count = (areas == 0).sum()
-            print(f"Degenerate faces (zero area) exact: {degenerate_count}")
-        except Exception:
-            pass
-
     # Validation report
     try:
         report = mesh.validate()
@@ -174,8 +229,9 @@ def main(argv):
     p.add_argument('file', help='Path to STL/mesh file')
     p.add_argument('--ascii-out', help='Write ASCII STL copy (path)')
     p.add_argument('--show', action='store_true', help='Open a viewer (may require extra deps)')
+    p.add_argument('--full', action='store_true', help='Always load with trimesh (watertight/winding/validate checks)')
     args = p.parse_args(argv)
-    return inspect(Path(args.file), args.ascii_out, args.show)
+    return inspect(Path(args.file), args.ascii_out, args.show, args.full)
 
 
 if __name__ == '__main__':